@@ -1,14 +1,7 @@
 # Complete E-Commerce Application
 from db import *
 import streamlit as st
-import psycopg2
-from psycopg2 import sql
-import re
-from datetime import datetime, timedelta
-import os
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from datetime import datetime, time as dt_time
 
 
 # ============================================
@@ -70,9 +63,8 @@ def add_customer_page():
                                    help="Street address, building number, etc.")
 
             # City dropdown - starts with first city in list
-            city_list = sorted(list(CAMBODIA_POSTAL_CODES.keys()))
             city = st.selectbox("City/District *",
-                               options=city_list,
+                               options=CITY_LIST,
                                index=0,  # Default to first city
                                help="Select your city or district")
 
@@ -98,21 +90,19 @@ def add_customer_page():
             city = city.strip()
             postal_code = postal_code.strip()
 
-            # Check if any field is empty
-            if not first_name:
-                st.error("❌ First Name is required")
-            elif not last_name:
-                st.error("❌ Last Name is required")
-            elif not email:
-                st.error("❌ Email is required")
-            elif not phone:
-                st.error("❌ Phone Number is required")
-            elif not address:
-                st.error("❌ Address is required")
-            elif not city:
-                st.error("❌ City is required")
-            elif not postal_code:
-                st.error("❌ Postal Code is required")
+            # Check every required field at once so all gaps are reported together
+            required = [
+                (first_name, "First Name"),
+                (last_name, "Last Name"),
+                (email, "Email"),
+                (phone, "Phone Number"),
+                (address, "Address"),
+                (city, "City"),
+                (postal_code, "Postal Code"),
+            ]
+            missing = [label for value, label in required if not value]
+            if missing:
+                st.error("❌ Missing required fields: " + ", ".join(missing))
             else:
                 # All fields filled, proceed with database insertion
                 success, message = db.add_customer(
@@ -136,7 +126,7 @@ def create_order_page():
         return
 
     # Customer selection
-    customer_options = {f"{c[1]} {c[2]} ({c[3]})": c[0] for c in customers}
+    customer_options = {f"{c['first_name']} {c['last_name']} ({c['email']})": c['customer_id'] for c in customers}
     selected_customer = st.selectbox("Select Customer *", list(customer_options.keys()))
     customer_id = customer_options[selected_customer]
 
@@ -145,14 +135,14 @@ def create_order_page():
     with col1:
         # Payment method selection
         payment_methods = db.get_payment_methods()
-        payment_options = {pm[1]: pm[0] for pm in payment_methods}
+        payment_options = {pm['method_name']: pm['payment_method_id'] for pm in payment_methods}
         selected_payment = st.selectbox("Payment Method *", list(payment_options.keys()))
         payment_method_id = payment_options[selected_payment]
 
     with col2:
         # Channel selection
         channels = db.get_channels()
-        channel_options = {f"{ch[1]} - {ch[2]}": ch[0] for ch in channels}
+        channel_options = {f"{ch['channel_name']} - {ch['description']}": ch['channel_id'] for ch in channels}
         selected_channel = st.selectbox("Order Channel *", list(channel_options.keys()))
         channel_id = channel_options[selected_channel]
 
@@ -161,9 +151,12 @@ def create_order_page():
     # Order items section
     st.subheader("📦 Add Products to Order")
 
-    # Initialize session state for items
+    # Initialize session state for items (cart keyed by product name)
     if 'order_items' not in st.session_state:
-        st.session_state.order_items = []
+        st.session_state.order_items = {}
+    # Running cart total, updated on add/remove instead of re-summed every rerun
+    if 'cart_total' not in st.session_state:
+        st.session_state.cart_total = 0.0
 
     # Category and Product Selection
     col_cat, col_prod = st.columns(2)
@@ -172,7 +165,7 @@ def create_order_page():
         # Get categories
         categories = db.get_product_categories()
         if categories:
-            category_options = {f"{cat[1]} - {cat[2]}": cat[0] for cat in categories}
+            category_options = {f"{cat['category_name']} - {cat['description']}": cat['category_id'] for cat in categories}
             selected_category = st.selectbox(
                 "Select Category",
                 list(category_options.keys()),
@@ -190,11 +183,11 @@ def create_order_page():
             if products:
                 # Format: "Product Name - $Price (Stock: X)"
                 product_options = {
-                    f"{p[1]} - ${p[3]:.2f} (Stock: {p[4]})": {
-                        'id': p[0],
-                        'name': p[1],
-                        'price': float(p[3]),
-                        'stock': p[4]
+                    f"{p['product_name']} - ${p['unit_price']:.2f} (Stock: {p['stock_quantity']})": {
+                        'id': p['product_id'],
+                        'name': p['product_name'],
+                        'price': float(p['unit_price']),
+                        'stock': p['stock_quantity']
                     } for p in products
                 }
                 selected_product = st.selectbox(
@@ -214,7 +207,7 @@ def create_order_page():
         col_qty, col_btn = st.columns([1, 1])
 
         with col_qty:
-            max_qty = min(product_info['stock'], 1000)  # Limit to stock or 1000
+            max_qty = min(product_info['stock'], MAX_QUANTITY)  # Limit to stock or the validator's cap
             quantity = st.number_input(
                 "Quantity",
                 min_value=1,
@@ -230,25 +223,24 @@ def create_order_page():
                 if quantity > product_info['stock']:
                     st.error(f"❌ Only {product_info['stock']} items available in stock")
                 else:
-                    # Check if product already in cart
-                    existing_item = None
-                    for idx, item in enumerate(st.session_state.order_items):
-                        if item['product_name'] == product_info['name']:
-                            existing_item = idx
-                            break
+                    cart = st.session_state.order_items
+                    existing_item = cart.get(product_info['name'])
 
                     if existing_item is not None:
                         # Update quantity
-                        st.session_state.order_items[existing_item]['quantity'] += quantity
+                        existing_item['quantity'] += quantity
                         st.success(f"✅ Updated {product_info['name']} quantity")
                     else:
                         # Add new item
-                        st.session_state.order_items.append({
-                            'product_name': product_info['name'],
+                        cart[product_info['name']] = {
+                            'product_id': product_info['id'],
                             'quantity': quantity,
                             'unit_price': product_info['price']
-                        })
+                        }
                         st.success(f"✅ Added {product_info['name']} to order")
+                    st.session_state.cart_total = round(
+                        st.session_state.cart_total + quantity * product_info['price'], 2
+                    )
                     st.rerun()
 
     # Display current cart
@@ -256,31 +248,31 @@ def create_order_page():
         st.markdown("---")
         st.subheader("🛒 Current Order Items")
 
-        total = 0
-        for idx, item in enumerate(st.session_state.order_items):
+        for product_name, item in st.session_state.order_items.items():
             subtotal = item['quantity'] * item['unit_price']
-            total += subtotal
 
             col_item, col_actions = st.columns([5, 1])
 
             with col_item:
-                st.write(f"**{item['product_name']}**")
+                st.write(f"**{product_name}**")
                 st.write(f"Qty: {item['quantity']} × ${item['unit_price']:.2f} = ${subtotal:.2f}")
 
             with col_actions:
-                if st.button("🗑️", key=f"remove_{idx}", help="Remove item"):
-                    st.session_state.order_items.pop(idx)
+                if st.button("🗑️", key=f"remove_{product_name}", help="Remove item"):
+                    st.session_state.order_items.pop(product_name)
+                    st.session_state.cart_total = round(st.session_state.cart_total - subtotal, 2)
                     st.rerun()
 
         st.markdown("---")
-        st.markdown(f"### **Total Amount: ${total:.2f}**")
+        st.markdown(f"### **Total Amount: ${st.session_state.cart_total:.2f}**")
 
         # Place Order Button
         col_clear, col_order = st.columns([1, 1])
 
         with col_clear:
             if st.button("🗑️ Clear All Items", type="secondary"):
-                st.session_state.order_items = []
+                st.session_state.order_items = {}
+                st.session_state.cart_total = 0.0
                 st.rerun()
 
         with col_order:
@@ -290,14 +282,19 @@ def create_order_page():
                 elif len(st.session_state.order_items) == 0:
                     st.error("❌ Please add at least one item")
                 else:
+                    items = [
+                        {'product_name': product_name, **item}
+                        for product_name, item in st.session_state.order_items.items()
+                    ]
                     success, message = db.create_order(
                         customer_id, payment_method_id, channel_id,
-                        total, shipping_address, st.session_state.order_items
+                        st.session_state.cart_total, shipping_address, items
                     )
 
                     if success:
                         st.success(f"✅ {message}")
-                        st.session_state.order_items = []
+                        st.session_state.order_items = {}
+                        st.session_state.cart_total = 0.0
                         st.balloons()
                         st.rerun()
                     else:
@@ -317,34 +314,40 @@ def view_customers_page():
         st.write(f"Total Customers: {len(customers)}")
 
         for customer in customers:
-            with st.expander(f"Customer ID: {customer[0]} - {customer[1]} {customer[2]}"):
-                st.write(f"**Email:** {customer[3]}")
-                st.write(f"**Phone:** {customer[4]}")
-                st.write(f"**City:** {customer[5]}")
+            with st.expander(f"Customer ID: {customer['customer_id']} - {customer['first_name']} {customer['last_name']}"):
+                st.write(f"**Email:** {customer['email']}")
+                st.write(f"**Phone:** {customer['phone']}")
+                st.write(f"**City:** {customer['city']}")
 
 def manage_orders_page():
     """Manage and update order status"""
     st.header("📦 Manage Orders")
 
-    # Get all orders
-    orders = db.get_all_orders()
+    total_orders = db.get_order_count()
 
-    if not orders:
+    if not total_orders:
         st.info("No orders found in the database.")
         return
 
-    st.write(f"Total Orders: {len(orders)}")
+    st.write(f"Total Orders: {total_orders}")
+
+    # Fetch and render only the current page of orders
+    page_size = 25
+    total_pages = (total_orders + page_size - 1) // page_size
+    page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
+    st.caption(f"Page {page} of {total_pages}")
+    orders = db.get_all_orders(limit=page_size, offset=(page - 1) * page_size)
 
     # Display orders in a table format
     for order in orders:
-        order_id = order[0]
-        order_date = order[1]
-        ship_date = order[2]
-        status = order[3]
-        total = order[4]
-        customer_name = f"{order[5]} {order[6]}"
-        payment = order[7]
-        channel = order[8]
+        order_id = order['order_id']
+        order_date = order['order_date']
+        ship_date = order['ship_date']
+        status = order['order_status']
+        total = order['total_amount']
+        customer_name = f"{order['first_name']} {order['last_name']}"
+        payment = order['method_name']
+        channel = order['channel_name']
 
         # Color code by status
         if status == 'Delivered':
@@ -389,10 +392,8 @@ def manage_orders_page():
                 with col_date:
                     # Only show ship_date input if status is Shipped or Delivered
                     if new_status in ["Shipped", "Delivered"]:
-                        import datetime
-
                         # Default to current ship_date or today
-                        default_date = ship_date if ship_date else datetime.datetime.now()
+                        default_date = ship_date if ship_date else datetime.now()
 
                         new_ship_date = st.date_input(
                             "Ship Date",
@@ -409,8 +410,7 @@ def manage_orders_page():
                 if submitted:
                     # Convert date to datetime if needed
                     if new_ship_date and new_status in ["Shipped", "Delivered"]:
-                        import datetime
-                        ship_datetime = datetime.datetime.combine(new_ship_date, datetime.time(12, 0))
+                        ship_datetime = datetime.combine(new_ship_date, dt_time(12, 0))
                     else:
                         ship_datetime = None
 
@@ -437,25 +437,24 @@ def view_order_details_page():
             order = order_data['order']
             items = order_data['items']
 
-            st.success(f"✅ Order #{order[0]} found")
+            st.success(f"✅ Order #{order['order_id']} found")
 
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                st.write(f"**Order Date:** {order[1]}")
-                st.write(f"**Customer:** {order[4]} {order[5]}")
-                st.write(f"**Email:** {order[6]}")
+                st.write(f"**Order Date:** {order['order_date']}")
+                st.write(f"**Customer:** {order['first_name']} {order['last_name']}")
+                st.write(f"**Email:** {order['email']}")
 
             with col2:
-                st.write(f"**Status:** {order[3]}")
-                st.write(f"**Payment Method:** {order[7]}")
-                st.write(f"**Channel:** {order[8]}")
+                st.write(f"**Status:** {order['order_status']}")
+                st.write(f"**Payment Method:** {order['method_name']}")
+                st.write(f"**Channel:** {order['channel_name']}")
 
             with col3:
-                st.write(f"**Total Amount:** ${order[2]:.2f}")
-                # Display ship_date (index 9)
-                if order[9]:
-                    st.write(f"**Ship Date:** {order[9]}")
+                st.write(f"**Total Amount:** ${order['total_amount']:.2f}")
+                if order['ship_date']:
+                    st.write(f"**Ship Date:** {order['ship_date']}")
                 else:
                     st.write(f"**Ship Date:** Not shipped yet")
 
@@ -463,10 +462,52 @@ def view_order_details_page():
             st.subheader("Order Items")
 
             for item in items:
-                st.write(f"• {item[0]} - Qty: {item[1]} × ${item[2]:.2f} = ${item[3]:.2f}")
-
-            st.markdown(f"### **Total: ${order[2]:.2f}**")
+                st.write(f"• {item['product_name']} - Qty: {item['quantity']} × ${item['unit_price']:.2f} = ${item['subtotal']:.2f}")
+
+            st.markdown(f"### **Total: ${order['total_amount']:.2f}**")
+
+
+CHART_LAYOUT = dict(
+    xaxis_title="",
+    yaxis_title="",
+    hovermode='x unified',
+    showlegend=False,
+    height=400,
+    margin=dict(l=20, r=20, t=20, b=20),
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    xaxis=dict(showgrid=False),
+    yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)')
+)
 
+@st.cache_data(ttl=60, show_spinner=False)
+def build_revenue_fig(data):
+    """Line chart of (date, revenue) pairs, reused across reruns with the same data"""
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame(data, columns=['date', 'revenue'])
+    fig = px.line(df, x='date', y='revenue', markers=True)
+    fig.update_traces(
+        line=dict(color='#1f77b4', width=2),
+        marker=dict(size=8),
+        hovertemplate='<b>Date:</b> %{x}<br><b>Revenue:</b> $%{y:.2f}<extra></extra>'
+    )
+    return fig.update_layout(**CHART_LAYOUT)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def build_orders_fig(data):
+    """Bar chart of (date, order_count) pairs, reused across reruns with the same data"""
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame(data, columns=['date', 'order_count'])
+    fig = px.bar(df, x='date', y='order_count')
+    fig.update_traces(
+        marker_color='#1f77b4',
+        hovertemplate='<b>Date:</b> %{x}<br><b>Orders:</b> %{y}<extra></extra>'
+    )
+    return fig.update_layout(**CHART_LAYOUT)
 
 def dashboard_page():
     """Analytics Dashboard with charts and data table"""
@@ -490,79 +531,24 @@ def dashboard_page():
     
     st.markdown("---")
     
-    # Charts section
+    # Charts section (both charts come from one daily-metrics query)
+    daily_metrics = db.get_daily_metrics(days=30)
     col_chart1, col_chart2 = st.columns(2)
     
     with col_chart1:
-        st.subheader("Revenue by day (from latest 200 orders)")
-        
-        # Get revenue data
-        revenue_data = db.get_revenue_by_day(limit=200)
+        st.subheader("Revenue by day (last 30 days)")
         
-        if revenue_data:
-            df_revenue = pd.DataFrame(revenue_data, columns=['date', 'revenue'])
-            
-            # Create line chart with plotly
-            fig_revenue = go.Figure()
-            fig_revenue.add_trace(go.Scatter(
-                x=df_revenue['date'],
-                y=df_revenue['revenue'],
-                mode='lines+markers',
-                name='Revenue',
-                line=dict(color='#1f77b4', width=2),
-                marker=dict(size=8),
-                hovertemplate='<b>Date:</b> %{x}<br><b>Revenue:</b> $%{y:.2f}<extra></extra>'
-            ))
-            
-            fig_revenue.update_layout(
-                xaxis_title="",
-                yaxis_title="",
-                hovermode='x unified',
-                showlegend=False,
-                height=400,
-                margin=dict(l=20, r=20, t=20, b=20),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(showgrid=False),
-                yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)')
-            )
-            
+        if daily_metrics:
+            fig_revenue = build_revenue_fig(tuple((r['date'], r['revenue']) for r in daily_metrics))
             st.plotly_chart(fig_revenue, use_container_width=True)
         else:
             st.info("No revenue data available")
     
     with col_chart2:
-        st.subheader("Orders by day (from latest 200 orders)")
-        
-        # Get orders count data
-        orders_data = db.get_orders_by_day(limit=200)
+        st.subheader("Orders by day (last 30 days)")
         
-        if orders_data:
-            df_orders = pd.DataFrame(orders_data, columns=['date', 'order_count'])
-            
-            # Create bar chart with plotly
-            fig_orders = go.Figure()
-            fig_orders.add_trace(go.Bar(
-                x=df_orders['date'],
-                y=df_orders['order_count'],
-                name='Orders',
-                marker_color='#1f77b4',
-                hovertemplate='<b>Date:</b> %{x}<br><b>Orders:</b> %{y}<extra></extra>'
-            ))
-            
-            fig_orders.update_layout(
-                xaxis_title="",
-                yaxis_title="",
-                hovermode='x unified',
-                showlegend=False,
-                height=400,
-                margin=dict(l=20, r=20, t=20, b=20),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(showgrid=False),
-                yaxis=dict(showgrid=True, gridcolor='rgba(128,128,128,0.2)')
-            )
-            
+        if daily_metrics:
+            fig_orders = build_orders_fig(tuple((r['date'], r['order_count']) for r in daily_metrics))
             st.plotly_chart(fig_orders, use_container_width=True)
         else:
             st.info("No order data available")
@@ -572,57 +558,33 @@ def dashboard_page():
     # Data table section
     st.subheader("Latest Orders Table")
     
-    # Get latest orders
-    orders = db.get_latest_orders_table(limit=200)
-    
-    if orders:
-        # Create DataFrame
-        df = pd.DataFrame(orders, columns=[
-            'order_id', 'customer_id', 'order_date', 'ship_date', 
-            'status', 'category', 'channel', 'total_amount', 
-            'discount', 'payment'
-        ])
-        
-        # Format dates
-        df['order_date'] = pd.to_datetime(df['order_date']).dt.strftime('%Y-%m-%d')
-        df['ship_date'] = df['ship_date'].apply(
-            lambda x: pd.to_datetime(x).strftime('%Y-%m-%d') if pd.notna(x) else 'None'
-        )
-        
-        # Format amounts
-        df['total_amount'] = df['total_amount'].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "$0.00")
-        df['discount'] = df['discount'].apply(lambda x: f"${x:.2f}" if pd.notna(x) and x > 0 else "None")
-        
-        # Rename columns for display
-        df = df.rename(columns={
-            'order_id': 'Order ID',
-            'customer_id': 'Customer ID',
-            'order_date': 'Order Date',
-            'ship_date': 'Ship Date',
-            'status': 'Status',
-            'category': 'Category',
-            'channel': 'Channel',
-            'total_amount': 'Total Amount',
-            'discount': 'Discount',
-            'payment': 'Payment'
-        })
-        
+    # Cached in db together with the CSV download, so both show the same rows
+    df = db.get_latest_orders_frame(limit=200)
+
+    if df is not None and not df.empty:
         # Display dataframe with custom styling
         st.dataframe(
             df,
             use_container_width=True,
             height=400,
-            hide_index=True
+            hide_index=True,
+            column_config={
+                "Order Date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+                "Ship Date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+                "Total Amount": st.column_config.NumberColumn(format="$%.2f"),
+                "Discount": st.column_config.NumberColumn(format="$%.2f"),
+            }
         )
         
-        # Download button
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download as CSV",
-            data=csv,
-            file_name=f"latest_orders_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+        # Download button (CSV is streamed straight from Postgres via COPY)
+        csv_data = db.export_latest_orders_csv(200)
+        if csv_data is not None:
+            st.download_button(
+                label="📥 Download as CSV",
+                data=csv_data,
+                file_name=f"latest_orders_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
     else:
         st.info("No orders found in the database")
 
@@ -1,36 +1,278 @@
-# Set environment variable from Colab secrets
+import io
+import itertools
 import os
 import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 import streamlit as st
 import psycopg2
-from psycopg2 import sql
+import psycopg2.errors
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor, execute_values
 
 # ============================================
 # DATABASE CONFIGURATION
 # ============================================
-# Use environment variable for database URL
-DB_URL = os.environ.get('NEON_DATABASE_URL')
-
-def get_db_connection():
-    """Establish database connection"""
+def _database_url():
+    """NEON_DATABASE_URL if set, else a DSN built from the [database] secrets section"""
+    url = os.environ.get('NEON_DATABASE_URL')
+    if url:
+        return url
     try:
-        conn = psycopg2.connect(DB_URL)
-        return conn
-    except Exception as e:
-        st.error(f"Database connection error: {e}")
+        secrets = st.secrets["database"]
+    except (KeyError, FileNotFoundError):
         return None
+    return psycopg2.extensions.make_dsn(
+        host=secrets["host"], dbname=secrets["database"], user=secrets["user"],
+        password=secrets["password"], port=secrets.get("port", "5432"),
+        sslmode=secrets.get("sslmode", "require")
+    )
+
+# Resolved once at import so secrets are never read on the connection path
+DB_URL = _database_url()
+
+# The pool keeps up to POOL_MIN_CONN idle connections (and their prepared
+# statements) for reuse and closes the rest; at most POOL_MAX_CONN are open
+POOL_MIN_CONN = 4
+POOL_MAX_CONN = 10
+# A pooled connection idle this long (seconds) is pinged before reuse, since
+# Neon ends idle sessions when the compute scales to zero
+IDLE_PING_SECONDS = 30
+# How long (seconds) a request waits for a free connection before failing
+POOL_WAIT_SECONDS = 10
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers whether the hot statements are prepared"""
+    # None = not attempted yet, False = server refused PREPARE
+    prepared = None
+    # time.monotonic() when last returned to the pool, None = never used
+    last_used = None
+
+@st.cache_resource(show_spinner=False)
+def get_connection_pool():
+    """Create the connection pool once and share it across reruns and sessions"""
+    # Keepalives let the client notice a dead TCP peer; they do not stop Neon
+    # from ending idle sessions, so borrow_conn also pings idle connections
+    return psycopg2.pool.ThreadedConnectionPool(
+        POOL_MIN_CONN, POOL_MAX_CONN, DB_URL, keepalives=1, keepalives_idle=30,
+        connection_factory=PreparingConnection,
+        # Rows come back as dicts keyed by column name
+        cursor_factory=RealDictCursor
+    )
+
+@st.cache_resource(show_spinner=False)
+def _pool_slots():
+    """One slot per pooled connection, so extra requests wait for a free one"""
+    # ThreadedConnectionPool raises PoolError when exhausted instead of blocking
+    return threading.BoundedSemaphore(POOL_MAX_CONN)
+
+def _is_alive(conn):
+    """False if the connection is closed or fails a ping after sitting idle"""
+    if conn.closed:
+        return False
+    if conn.last_used is None or time.monotonic() - conn.last_used < IDLE_PING_SECONDS:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+def _borrow_connection():
+    """Borrow a live connection, returned with the pool it must go back to"""
+    pool = get_connection_pool()
+    # Dead idle connections are discarded; once the idle ones run out the
+    # pool opens a fresh connection, which needs no ping
+    for _ in range(POOL_MAX_CONN + 1):
+        try:
+            conn = pool.getconn()
+        except psycopg2.OperationalError:
+            # Neon may refuse a fresh handshake while waking up - retry once
+            conn = pool.getconn()
+        if _is_alive(conn):
+            break
+        pool.putconn(conn, close=True)
+    else:
+        raise psycopg2.OperationalError("No live database connection available")
+    return pool, conn
+
+@contextmanager
+def borrow_conn():
+    """Borrow a pooled connection for the duration of a with-block"""
+    slots = _pool_slots()
+    if not slots.acquire(timeout=POOL_WAIT_SECONDS):
+        raise psycopg2.pool.PoolError("All database connections are busy, please retry")
+    try:
+        # Keep the pool it came from: if the resource cache is cleared meanwhile,
+        # get_connection_pool() would build a new pool that doesn't know conn
+        pool, conn = _borrow_connection()
+        broken = False
+        try:
+            # Inside the try so a connection that dies while preparing is
+            # still returned (and closed) rather than leaking its pool slot
+            if conn.prepared is None:
+                prepare_statements(conn)
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            # The pool rolls back unfinished transactions; broken connections are
+            # closed instead of being handed to the next caller
+            conn.last_used = time.monotonic()
+            pool.putconn(conn, close=broken or bool(conn.closed))
+    finally:
+        slots.release()
+
+# ============================================
+# PREPARED STATEMENTS
+# ============================================
+# Hot queries are prepared once per pooled connection so Postgres skips
+# parsing and planning on every call. Parameter types are inferred.
+PREPARED_STATEMENTS = {
+    'products_by_category': """
+        SELECT product_id, product_name, description, unit_price, stock_quantity
+        FROM products
+        WHERE category_id = %s AND is_active = TRUE
+        ORDER BY product_name
+    """,
+    'product_details': """
+        SELECT p.product_id, p.product_name, p.description, p.unit_price,
+               p.stock_quantity, c.category_name
+        FROM products p
+        JOIN product_categories c ON p.category_id = c.category_id
+        WHERE p.product_id = %s AND p.is_active = TRUE
+    """,
+    # The order's items come back as one JSON array, so details take one round trip
+    'order_details': """
+        SELECT o.order_id, o.order_date, o.total_amount, o.order_status,
+               c.first_name, c.last_name, c.email,
+               pm.method_name, ch.channel_name, o.ship_date,
+               COALESCE((
+                   SELECT json_agg(json_build_object(
+                       'product_name', oi.product_name, 'quantity', oi.quantity,
+                       'unit_price', oi.unit_price, 'subtotal', oi.subtotal))
+                   FROM order_items oi
+                   WHERE oi.order_id = o.order_id
+               ), '[]') AS items
+        FROM orders o
+        JOIN customers c ON o.customer_id = c.customer_id
+        JOIN payment_methods pm ON o.payment_method_id = pm.payment_method_id
+        JOIN channels ch ON o.channel_id = ch.channel_id
+        WHERE o.order_id = %s
+    """,
+    'order_date_status': """
+        SELECT order_date, order_status
+        FROM orders
+        WHERE order_id = %s
+    """,
+    'insert_customer': """
+        INSERT INTO customers (first_name, last_name, email, phone, address, city, postal_code)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING customer_id
+    """,
+    'update_order_status': """
+        UPDATE orders
+        SET order_status = %s
+        WHERE order_id = %s
+        RETURNING order_id
+    """,
+    # The ship-date rule is checked in the WHERE clause so the update is one round trip
+    'update_order_status_ship_date': """
+        UPDATE orders
+        SET order_status = %s, ship_date = %s
+        WHERE order_id = %s AND order_date <= %s
+        RETURNING order_id
+    """,
+}
+
+def prepare_statements(conn):
+    """PREPARE every statement in PREPARED_STATEMENTS on a fresh connection"""
+    statements = []
+    for name, query in PREPARED_STATEMENTS.items():
+        counter = itertools.count(1)
+        positional = re.sub(r'%s', lambda m: f"${next(counter)}", query)
+        statements.append(f"PREPARE {name} AS {positional}")
+    # Autocommit sends everything as one query: a single round trip, no BEGIN/COMMIT
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(";\n".join(statements))
+        conn.prepared = True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # The connection itself is gone; borrow_conn closes it
+        raise
+    except psycopg2.Error:
+        # Transaction-mode poolers (e.g. PgBouncer) reject SQL-level PREPARE
+        conn.prepared = False
+    finally:
+        if not conn.closed:
+            conn.autocommit = False
+
+def execute_prepared(cursor, name, params):
+    """Run a statement from PREPARED_STATEMENTS, falling back to plain SQL
+
+    Only use it for reads or the first write of a transaction: if the server
+    has lost the statement, the transaction is rolled back and retried.
+    """
+    conn = cursor.connection
+    if conn.prepared:
+        placeholders = ", ".join(["%s"] * len(params))
+        try:
+            cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+            return
+        except psycopg2.errors.InvalidSqlStatementName:
+            conn.rollback()
+            conn.prepared = False
+    cursor.execute(PREPARED_STATEMENTS[name], params)
+
+def _copy_csv(rows):
+    """Rows as a COPY ... WITH CSV buffer that keeps None and '' apart"""
+    # COPY reads an unquoted empty field as NULL but never a quoted one, so
+    # every value except None is quoted (csv.writer writes both as ``,,``)
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(",".join('' if value is None else '"' + str(value).replace('"', '""') + '"'
+                           for value in row))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
 
 # ============================================
 # DATA VALIDATION CLASS
 # ============================================
+# Patterns are compiled once at import instead of on every form submit
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_CLEAN_RE = re.compile(r'[\s\-()]')
+# Local (0XX), international (+855) and international without + (855) formats
+_PHONE_RE = re.compile(r'^(?:0|\+?855)(1[0-9]|6[1-9]|7[0-9]|8[1-9]|9[0-9])\d{6,7}$')
+_NAME_RE = re.compile(r'^[\u1780-\u17FFa-zA-Z\s\-\']+$')
+_POSTAL_RE = re.compile(r'^\d{5,6}$')
+# Shared by the per-item validators and the vectorised batch check
+MAX_AMOUNT = 999999.99
+MAX_QUANTITY = 1000
+# Keys every order item must carry (product_id is optional)
+ORDER_ITEM_FIELDS = ('product_name', 'quantity', 'unit_price')
+
+def _parse_iso_datetime(value):
+    """Parse an ISO 8601 timestamp, accepting a trailing Z on Python < 3.11"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
 class DataValidator:
     """Validation rules for all input fields"""
 
     @staticmethod
     def validate_email(email):
         """Validate email format"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, email):
+        if not _EMAIL_RE.match(email):
             return False, "Invalid email format"
         return True, "Valid"
 
@@ -46,18 +288,11 @@ class DataValidator:
         Common prefixes: 010, 011, 012, 015, 016, 017, 061, 069, 070, 071, 076, 077, 078, 079, 081, 085, 086, 087, 089, 090, 092, 093, 095, 096, 097, 098, 099
         """
         # Remove spaces, hyphens, and parentheses for validation
-        cleaned_phone = re.sub(r'[\s\-()]', '', phone)
-
-        # Pattern 1: Starting with 0 (local format) - 9 or 10 digits
-        pattern1 = r'^0(1[0-9]|6[1-9]|7[0-9]|8[1-9]|9[0-9])\d{6,7}$'
+        cleaned_phone = _PHONE_CLEAN_RE.sub('', phone)
 
-        # Pattern 2: Starting with +855 (international format)
-        pattern2 = r'^\+855(1[0-9]|6[1-9]|7[0-9]|8[1-9]|9[0-9])\d{6,7}$'
-
-        # Pattern 3: Starting with 855 (international without +)
-        pattern3 = r'^855(1[0-9]|6[1-9]|7[0-9]|8[1-9]|9[0-9])\d{6,7}$'
-
-        if re.match(pattern1, cleaned_phone) or re.match(pattern2, cleaned_phone) or re.match(pattern3, cleaned_phone):
+        # Valid numbers are 9-13 characters once cleaned; reject anything else before matching
+        # One pass covers 0XX..., +855XX... and 855XX... (9-10 digit local part)
+        if 9 <= len(cleaned_phone) <= 13 and _PHONE_RE.match(cleaned_phone):
             return True, "Valid"
         else:
             return False, "Invalid Cambodian phone number. Format: 0XX XXX XXX or +855 XX XXX XXX"
@@ -70,7 +305,7 @@ class DataValidator:
         if len(name) > 50:
             return False, f"{field_name} cannot exceed 50 characters"
         # Allow Khmer Unicode characters and Latin letters
-        if not re.match(r'^[\u1780-\u17FFa-zA-Z\s\-\']+$', name):
+        if not _NAME_RE.match(name):
             return False, f"{field_name} can only contain letters (Khmer or English), spaces, hyphens, and apostrophes"
         return True, "Valid"
 
@@ -82,7 +317,7 @@ class DataValidator:
         if len(postal_code) > 6:
             return False, "Postal code cannot exceed 6 characters"
         # Cambodia postal codes are 5-6 digits
-        if not re.match(r'^\d{5,6}$', postal_code.strip()):
+        if not _POSTAL_RE.match(postal_code.strip()):
             return False, "Postal code must be 5-6 digits"
         return True, "Valid"
 
@@ -93,10 +328,10 @@ class DataValidator:
             amount_float = float(amount)
             if amount_float < 0:
                 return False, "Amount cannot be negative"
-            if amount_float > 999999.99:
+            if amount_float > MAX_AMOUNT:
                 return False, "Amount exceeds maximum limit"
             return True, "Valid"
-        except ValueError:
+        except (TypeError, ValueError):
             return False, "Invalid amount format"
 
     @staticmethod
@@ -106,10 +341,10 @@ class DataValidator:
             qty = int(quantity)
             if qty <= 0:
                 return False, "Quantity must be greater than 0"
-            if qty > 1000:
-                return False, "Quantity cannot exceed 1000"
+            if qty > MAX_QUANTITY:
+                return False, f"Quantity cannot exceed {MAX_QUANTITY}"
             return True, "Valid"
-        except ValueError:
+        except (TypeError, ValueError):
             return False, "Quantity must be a number"
 
     @staticmethod
@@ -117,8 +352,6 @@ class DataValidator:
         """
         Validate that ship_date is after order_date
         """
-        from datetime import datetime
-
         try:
             # If ship_date is None, it's valid (order not shipped yet)
             if ship_date is None:
@@ -126,9 +359,9 @@ class DataValidator:
 
             # Convert strings to datetime if needed
             if isinstance(order_date, str):
-                order_date = datetime.fromisoformat(order_date.replace('Z', '+00:00'))
+                order_date = _parse_iso_datetime(order_date)
             if isinstance(ship_date, str):
-                ship_date = datetime.fromisoformat(ship_date.replace('Z', '+00:00'))
+                ship_date = _parse_iso_datetime(ship_date)
 
             # Check if ship_date is after order_date
             if ship_date < order_date:
@@ -141,7 +374,9 @@ class DataValidator:
 # ============================================
 # CAMBODIA POSTAL CODE DATABASE
 # ============================================
-CAMBODIA_POSTAL_CODES = {
+# Read-only view so the table can't be mutated at runtime; the literals
+# are code constants, so repeated codes already share one string object
+CAMBODIA_POSTAL_CODES = MappingProxyType({
     # Phnom Penh
     "Phnom Penh": "120101",
     "Khan Chamkar Mon": "120101",
@@ -245,21 +480,206 @@ CAMBODIA_POSTAL_CODES = {
     "Oddar Meanchey": "220101",
     "Banteay Meanchey": "010101",
     "Pailin": "240101",
-}
+})
 
+# Sorted once at import for the city dropdown
+CITY_LIST = sorted(CAMBODIA_POSTAL_CODES)
+# Case-insensitive index, built once instead of lowercasing every key per lookup
+_POSTAL_BY_LOWER = MappingProxyType(
+    {city.lower(): code for city, code in CAMBODIA_POSTAL_CODES.items()}
+)
+
+@lru_cache(maxsize=1024)
 def get_postal_code(city):
     """Get postal code based on city name"""
-    # Try exact match first
-    if city in CAMBODIA_POSTAL_CODES:
-        return CAMBODIA_POSTAL_CODES[city]
-
-    # Try case-insensitive match
-    for key, value in CAMBODIA_POSTAL_CODES.items():
-        if key.lower() == city.lower():
-            return value
-
+    # Exact names (the city dropdown) skip the strip/lower allocations
+    code = CAMBODIA_POSTAL_CODES.get(city)
+    if code:
+        return code
     # Default postal code if not found
-    return "120101"  # Default to Phnom Penh
+    return _POSTAL_BY_LOWER.get(city.strip().lower(), "120101")  # Default to Phnom Penh
+
+# ============================================
+# CACHED READ QUERIES
+# ============================================
+# Every widget interaction reruns the script, so reads are served from
+# st.cache_data until the TTL expires or a write clears the cache.
+# These helpers raise on failure so errors are never cached;
+# ECommerceDB reports them to the user.
+def _query_all(query, params=None):
+    """Run a read query on a pooled connection and return all rows"""
+    with borrow_conn() as conn, conn.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+def _query_stream(query, params=None, batch_size=2000):
+    """Run an unbounded read through a server-side cursor, batch_size rows per fetch"""
+    # libpq never buffers the whole result alongside the Python rows
+    with borrow_conn() as conn, conn.cursor(name='stream_rows') as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(query, params)
+        return list(cursor)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_payment_methods():
+    return _query_all("SELECT payment_method_id, method_name FROM payment_methods WHERE is_active = TRUE")
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_channels():
+    return _query_all("SELECT channel_id, channel_name, description FROM channels")
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_customers():
+    return _query_stream("""
+        SELECT customer_id, first_name, last_name, email, phone, city
+        FROM customers
+        ORDER BY created_at DESC
+    """)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_product_categories():
+    return _query_all("""
+        SELECT category_id, category_name, description
+        FROM product_categories
+        WHERE is_active = TRUE
+        ORDER BY category_name
+    """)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_products_by_category(category_id):
+    with borrow_conn() as conn, conn.cursor() as cursor:
+        execute_prepared(cursor, 'products_by_category', (category_id,))
+        return cursor.fetchall()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_product_details(product_id):
+    # Repeated lookups within a rerun hit the cache; the short TTL picks up
+    # catalogue edits made outside the app
+    with borrow_conn() as conn, conn.cursor() as cursor:
+        execute_prepared(cursor, 'product_details', (product_id,))
+        return cursor.fetchone()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_all_orders(limit, offset):
+    # LIMIT NULL returns every row (streamed); order_id breaks ties so pages never overlap
+    query = _query_stream if limit is None else _query_all
+    return query("""
+        SELECT o.order_id, o.order_date, o.ship_date, o.order_status,
+               o.total_amount, c.first_name, c.last_name,
+               pm.method_name, ch.channel_name
+        FROM orders o
+        JOIN customers c ON o.customer_id = c.customer_id
+        JOIN payment_methods pm ON o.payment_method_id = pm.payment_method_id
+        JOIN channels ch ON o.channel_id = ch.channel_id
+        ORDER BY o.order_date DESC, o.order_id DESC
+        LIMIT %s OFFSET %s
+    """, (limit, offset))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_order_count():
+    return _query_all("SELECT COUNT(*) AS order_count FROM orders")[0]['order_count']
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_daily_metrics(days):
+    # A date-range predicate is an index range scan feeding the aggregate,
+    # with no top-N sort
+    return _query_all("""
+        SELECT
+            DATE(order_date) as date,
+            SUM(total_amount) as revenue,
+            COUNT(*) as order_count
+        FROM orders
+        WHERE order_date >= CURRENT_DATE - %s * INTERVAL '1 day'
+        GROUP BY DATE(order_date)
+        ORDER BY date
+    """, (days,))
+
+# Column names are display-ready straight from SQL; dates and amounts stay
+# typed and are formatted by the dashboard. Shared with the CSV export
+LATEST_ORDERS_QUERY = """
+        SELECT
+            o.order_id as "Order ID",
+            o.customer_id as "Customer ID",
+            o.order_date::date as "Order Date",
+            o.ship_date::date as "Ship Date",
+            o.order_status as "Status",
+            -- One category per order, so line items don't multiply the rows
+            (SELECT pc.category_name
+             FROM order_items oi
+             JOIN products p ON oi.product_id = p.product_id
+             JOIN product_categories pc ON p.category_id = pc.category_id
+             WHERE oi.order_id = o.order_id
+             LIMIT 1) as "Category",
+            ch.channel_name as "Channel",
+            ROUND(COALESCE(o.total_amount, 0), 2) as "Total Amount",
+            CASE WHEN o.discount > 0 THEN ROUND(o.discount, 2) END as "Discount",
+            pm.method_name as "Payment"
+        FROM orders o
+        JOIN channels ch ON o.channel_id = ch.channel_id
+        JOIN payment_methods pm ON o.payment_method_id = pm.payment_method_id
+        ORDER BY o.order_date DESC, o.order_id DESC
+        LIMIT %s
+"""
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_latest_orders(limit):
+    """One COPY snapshot of the latest orders as (typed DataFrame, CSV bytes)"""
+    import pandas as pd  # only the dashboard needs it
+
+    with borrow_conn() as conn, conn.cursor() as cursor:
+        # COPY takes no bind parameters, so the limit is bound client-side first
+        query = cursor.mogrify(LATEST_ORDERS_QUERY, (limit,)).decode()
+        buf = io.BytesIO()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV HEADER", buf)
+
+    # The table is parsed from the same bytes as the download, so the two
+    # always show the same rows; only the nullable columns read '' as missing
+    buf.seek(0)
+    df = pd.read_csv(buf, keep_default_na=False,
+                     na_values={'Ship Date': [''], 'Category': [''], 'Discount': ['']})
+    df['Order Date'] = pd.to_datetime(df['Order Date'])
+    df['Ship Date'] = pd.to_datetime(df['Ship Date'])
+    df['Total Amount'] = df['Total Amount'].astype('float64')
+    df['Discount'] = df['Discount'].astype('float64')
+    return df, buf.getvalue()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_dashboard_stats():
+    with borrow_conn() as conn, conn.cursor() as cursor:
+        # Every stat in one round trip: orders is grouped by status once and the
+        # totals are rolled up from those groups; status counts come back as JSON
+        cursor.execute("""
+            WITH by_status AS (
+                SELECT order_status,
+                       COUNT(*) AS order_count,
+                       COUNT(total_amount) AS priced_count,
+                       SUM(total_amount) AS revenue
+                FROM orders
+                GROUP BY order_status
+            )
+            SELECT COALESCE(SUM(revenue), 0) AS total_revenue,
+                   COALESCE(SUM(order_count), 0)::bigint AS total_orders,
+                   COALESCE(SUM(revenue) / NULLIF(SUM(priced_count), 0), 0) AS avg_order_value,
+                   (SELECT COUNT(*) FROM customers) AS total_customers,
+                   COALESCE(json_agg(json_build_object(
+                       'order_status', order_status, 'order_count', order_count)), '[]') AS orders_by_status
+            FROM by_status
+        """)
+        totals = cursor.fetchone()
+
+        return {
+            'total_revenue': float(totals['total_revenue']),
+            'total_orders': totals['total_orders'],
+            'total_customers': totals['total_customers'],
+            'avg_order_value': float(totals['avg_order_value']),
+            'orders_by_status': totals['orders_by_status']
+        }
+
+def _clear_order_caches():
+    """Drop cached reads that depend on orders (reference tables stay cached)"""
+    for fetch in (_fetch_all_orders, _fetch_order_count, _fetch_daily_metrics,
+                  _fetch_latest_orders, _fetch_dashboard_stats):
+        fetch.clear()
 
 # ============================================
 # DATABASE OPERATIONS CLASS
@@ -270,10 +690,8 @@ class ECommerceDB:
     def __init__(self):
         self.validator = DataValidator()
 
-    def add_customer(self, first_name, last_name, email, phone, address, city, postal_code):
-        """Add a new customer with validation"""
-
-        # Validate all fields
+    def _validate_customer(self, first_name, last_name, email, phone, postal_code):
+        """Return the first validation failure message, or None if the customer is valid"""
         validations = [
             self.validator.validate_name(first_name, "First name"),
             self.validator.validate_name(last_name, "Last name"),
@@ -284,35 +702,116 @@ class ECommerceDB:
 
         for is_valid, message in validations:
             if not is_valid:
-                return False, message
+                return message
+        return None
 
-        # Insert into database
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection failed"
+    def add_customer(self, first_name, last_name, email, phone, address, city, postal_code):
+        """Add a new customer with validation"""
+
+        # Validate all fields
+        message = self._validate_customer(first_name, last_name, email, phone, postal_code)
+        if message:
+            return False, message
 
+        # Insert into database (the pool rolls back anything left uncommitted)
         try:
-            cursor = conn.cursor()
-            query = """
-                INSERT INTO customers (first_name, last_name, email, phone, address, city, postal_code)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING customer_id
-            """
-            cursor.execute(query, (first_name, last_name, email, phone, address, city, postal_code))
-            customer_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True, f"Customer added successfully! ID: {customer_id}"
+            with borrow_conn() as conn, conn.cursor() as cursor:
+                execute_prepared(cursor, 'insert_customer',
+                                 (first_name, last_name, email, phone, address, city, postal_code))
+                customer_id = cursor.fetchone()['customer_id']
+                conn.commit()
         except psycopg2.IntegrityError as e:
-            conn.rollback()
             if 'email' in str(e):
                 return False, "Email already exists in the system"
             return False, "Database integrity error"
         except Exception as e:
-            conn.rollback()
             return False, f"Error adding customer: {str(e)}"
 
+        # Make the new row visible to the cached reads immediately
+        _fetch_customers.clear()
+        _fetch_dashboard_stats.clear()
+        return True, f"Customer added successfully! ID: {customer_id}"
+
+    def add_customers_bulk(self, rows):
+        """
+        Insert many customers with a single COPY (e.g. a CSV import)
+        rows: (first_name, last_name, email, phone, address, city, postal_code) tuples
+        Returns (inserted_count, errors) where errors lists (row, message) for skipped rows
+        """
+        valid = []
+        errors = []
+
+        for row in rows:
+            # A malformed row (wrong field count, NaN or other non-text cells)
+            # is reported like any other invalid row instead of aborting the import
+            try:
+                first_name, last_name, email, phone, address, city, postal_code = row
+                message = self._validate_customer(first_name, last_name, email, phone, postal_code)
+            except (TypeError, ValueError, AttributeError):
+                message = "Malformed row: expected 7 text fields"
+            if message:
+                errors.append((row, message))
+                continue
+            valid.append(row)
+
+        inserted = len(valid)
+        if not inserted:
+            return 0, errors
+
+        # COPY is all-or-nothing: one duplicate email rejects the whole batch
+        try:
+            with borrow_conn() as conn, conn.cursor() as cursor:
+                cursor.copy_expert("""
+                    COPY customers (first_name, last_name, email, phone, address, city, postal_code)
+                    FROM STDIN WITH CSV
+                """, _copy_csv(valid))
+                conn.commit()
+        except psycopg2.IntegrityError as e:
+            if 'email' in str(e):
+                return 0, errors + [(None, "Email already exists in the system")]
+            return 0, errors + [(None, "Database integrity error")]
+        except Exception as e:
+            return 0, errors + [(None, f"Error importing customers: {str(e)}")]
+
+        _fetch_customers.clear()
+        _fetch_dashboard_stats.clear()
+        return inserted, errors
+
+    def _validate_items(self, items):
+        """Return the first invalid item's message, or None if every item is valid"""
+        # Long batches (scripted loads) are checked in one vectorised pass; only
+        # a failing batch falls through to the loop to find the offending item
+        if len(items) >= 50 and self._items_all_valid(items):
+            return None
+        for item in items:
+            missing = [key for key in ORDER_ITEM_FIELDS if key not in item]
+            if missing:
+                return f"Order item is missing {', '.join(missing)}"
+
+            is_valid, message = self.validator.validate_quantity(item['quantity'])
+            if not is_valid:
+                return message
+
+            is_valid, message = self.validator.validate_amount(item['unit_price'])
+            if not is_valid:
+                return message
+        return None
+
+    @staticmethod
+    def _items_all_valid(items):
+        """Vectorised form of the per-item quantity/price checks"""
+        import numpy as np  # comes with pandas; imported lazily like pandas in app.py
+
+        try:
+            quantities = np.fromiter((item['quantity'] for item in items),
+                                     dtype=np.int64, count=len(items))
+            prices = np.fromiter((item['unit_price'] for item in items),
+                                 dtype=np.float64, count=len(items))
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return False
+        return bool(np.all((quantities > 0) & (quantities <= MAX_QUANTITY))
+                    and np.all((prices >= 0) & (prices <= MAX_AMOUNT)))
+
     def create_order(self, customer_id, payment_method_id, channel_id,
                      total_amount, shipping_address, items):
         """Create a new order with items"""
@@ -322,458 +821,254 @@ class ECommerceDB:
         if not is_valid:
             return False, message
 
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection failed"
+        if not items:
+            return False, "Order must contain at least one item"
+
+        # Validate every item before borrowing a connection
+        message = self._validate_items(items)
+        if message:
+            return False, message
 
         try:
-            cursor = conn.cursor()
-
-            # Insert order
-            order_query = """
-                INSERT INTO orders (customer_id, payment_method_id, channel_id,
-                                   total_amount, shipping_address)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING order_id
-            """
-            cursor.execute(order_query, (customer_id, payment_method_id, channel_id,
-                                        total_amount, shipping_address))
-            order_id = cursor.fetchone()[0]
-
-            # Insert order items
-            for item in items:
-                is_valid, msg = self.validator.validate_quantity(item['quantity'])
-                if not is_valid:
-                    raise ValueError(msg)
-
-                is_valid, msg = self.validator.validate_amount(item['unit_price'])
-                if not is_valid:
-                    raise ValueError(msg)
-
-                item_query = """
-                    INSERT INTO order_items (order_id, product_name, quantity,
-                                            unit_price, subtotal)
-                    VALUES (%s, %s, %s, %s, %s)
-                """
-                subtotal = item['quantity'] * item['unit_price']
-                cursor.execute(item_query, (order_id, item['product_name'],
-                                          item['quantity'], item['unit_price'], subtotal))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True, f"Order created successfully! Order ID: {order_id}"
+            with borrow_conn() as conn, conn.cursor() as cursor:
+                # Insert the order and all its items in one statement (one round trip);
+                # subtotal is a generated column computed by Postgres
+                item_values = ", ".join(["(%s, %s, %s, %s)"] * len(items))
+                cursor.execute(f"""
+                    WITH new_order AS (
+                        INSERT INTO orders (customer_id, payment_method_id, channel_id,
+                                           total_amount, shipping_address)
+                        VALUES (%s, %s, %s, %s, %s)
+                        RETURNING order_id
+                    ), new_items AS (
+                        INSERT INTO order_items (order_id, product_id, product_name, quantity, unit_price)
+                        SELECT new_order.order_id,
+                               -- Items without an id are resolved by name
+                               COALESCE(i.product_id::integer,
+                                        (SELECT p.product_id FROM products p
+                                         WHERE p.product_name = i.product_name
+                                         ORDER BY p.product_id LIMIT 1)),
+                               i.product_name, i.quantity, i.unit_price
+                        FROM new_order,
+                             (VALUES {item_values}) AS i (product_id, product_name, quantity, unit_price)
+                    )
+                    SELECT order_id FROM new_order
+                """, [customer_id, payment_method_id, channel_id, total_amount, shipping_address]
+                   + [value for item in items
+                      for value in (item.get('product_id'), item['product_name'],
+                                    item['quantity'], item['unit_price'])])
+                order_id = cursor.fetchone()['order_id']
+
+                conn.commit()
         except Exception as e:
-            conn.rollback()
-            conn.close()
             return False, f"Error creating order: {str(e)}"
 
+        _clear_order_caches()
+        return True, f"Order created successfully! Order ID: {order_id}"
+
+    def bulk_create_order_items(self, order_id, items):
+        """
+        Add many items to an existing order (e.g. scripted historical loads)
+        Large batches are streamed with COPY; small ones use a multi-row INSERT.
+        Items without a product_id are resolved by name, as in create_order;
+        the order's total_amount is left as is.
+        """
+        message = self._validate_items(items)
+        if message:
+            return False, message
+
+        try:
+            with borrow_conn() as conn, conn.cursor() as cursor:
+                # One lookup for every name that arrived without an id
+                missing = {item['product_name'] for item in items if item.get('product_id') is None}
+                ids_by_name = {}
+                if missing:
+                    cursor.execute("""
+                        SELECT DISTINCT ON (product_name) product_name, product_id
+                        FROM products
+                        WHERE product_name = ANY(%s)
+                        ORDER BY product_name, product_id
+                    """, (list(missing),))
+                    ids_by_name = {row['product_name']: row['product_id'] for row in cursor}
+
+                rows = [(order_id,
+                         item.get('product_id') or ids_by_name.get(item['product_name']),
+                         item['product_name'], item['quantity'], item['unit_price'])
+                        for item in items]
+
+                # COPY only pays off once its setup cost is spread over enough rows
+                if len(rows) < 50:
+                    execute_values(cursor, """
+                        INSERT INTO order_items (order_id, product_id, product_name,
+                                                 quantity, unit_price)
+                        VALUES %s
+                    """, rows, page_size=100)
+                else:
+                    cursor.copy_expert("""
+                        COPY order_items (order_id, product_id, product_name, quantity, unit_price)
+                        FROM STDIN WITH CSV
+                    """, _copy_csv(rows))
+                conn.commit()
+        except Exception as e:
+            return False, f"Error adding order items: {str(e)}"
+
+        _clear_order_caches()
+        return True, f"Added {len(rows)} items to order #{order_id}"
+
     def get_payment_methods(self):
         """Retrieve all active payment methods"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT payment_method_id, method_name FROM payment_methods WHERE is_active = TRUE")
-            methods = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return methods
+            return _fetch_payment_methods()
         except Exception as e:
             st.error(f"Error fetching payment methods: {e}")
             return []
 
     def get_channels(self):
         """Retrieve all channels"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT channel_id, channel_name, description FROM channels")
-            channels = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return channels
+            return _fetch_channels()
         except Exception as e:
             st.error(f"Error fetching channels: {e}")
             return []
 
     def get_customers(self):
         """Retrieve all customers"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT customer_id, first_name, last_name, email, phone, city
-                FROM customers
-                ORDER BY created_at DESC
-            """)
-            customers = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return customers
+            return _fetch_customers()
         except Exception as e:
             st.error(f"Error fetching customers: {e}")
             return []
 
     def get_product_categories(self):
-      """Retrieve all active product categories"""
-      conn = get_db_connection()
-      if not conn:
-          return []
-
-      try:
-          cursor = conn.cursor()
-          cursor.execute("""
-              SELECT category_id, category_name, description
-              FROM product_categories
-              WHERE is_active = TRUE
-              ORDER BY category_name
-          """)
-          categories = cursor.fetchall()
-          cursor.close()
-          conn.close()
-          return categories
-      except Exception as e:
-          st.error(f"Error fetching categories: {e}")
-          return []
+        """Retrieve all active product categories"""
+        try:
+            return _fetch_product_categories()
+        except Exception as e:
+            st.error(f"Error fetching categories: {e}")
+            return []
 
     def get_products_by_category(self, category_id):
-      """Retrieve all active products for a specific category"""
-      conn = get_db_connection()
-      if not conn:
-          return []
-
-      try:
-          cursor = conn.cursor()
-          cursor.execute("""
-              SELECT product_id, product_name, description, unit_price, stock_quantity
-              FROM products
-              WHERE category_id = %s AND is_active = TRUE
-              ORDER BY product_name
-          """, (category_id,))
-          products = cursor.fetchall()
-          cursor.close()
-          conn.close()
-          return products
-      except Exception as e:
-          st.error(f"Error fetching products: {e}")
-          return []
+        """Retrieve all active products for a specific category"""
+        try:
+            return _fetch_products_by_category(category_id)
+        except Exception as e:
+            st.error(f"Error fetching products: {e}")
+            return []
 
     def get_product_details(self, product_id):
-      """Get details of a specific product"""
-      conn = get_db_connection()
-      if not conn:
-          return None
-
-      try:
-          cursor = conn.cursor()
-          cursor.execute("""
-              SELECT p.product_id, p.product_name, p.description, p.unit_price,
-                    p.stock_quantity, c.category_name
-              FROM products p
-              JOIN product_categories c ON p.category_id = c.category_id
-              WHERE p.product_id = %s AND p.is_active = TRUE
-          """, (product_id,))
-          product = cursor.fetchone()
-          cursor.close()
-          conn.close()
-          return product
-      except Exception as e:
-          st.error(f"Error fetching product details: {e}")
-          return None
+        """Get details of a specific product"""
+        try:
+            return _fetch_product_details(product_id)
+        except Exception as e:
+            st.error(f"Error fetching product details: {e}")
+            return None
 
 
     def update_order_status(self, order_id, new_status, ship_date=None):
         """
         Update order status and ship_date with validation
         """
-        conn = get_db_connection()
-        if not conn:
-            return False, "Database connection failed"
-
         try:
-            cursor = conn.cursor()
-
-            # Get current order details
-            cursor.execute("""
-                SELECT order_date, order_status
-                FROM orders
-                WHERE order_id = %s
-            """, (order_id,))
-
-            result = cursor.fetchone()
-            if not result:
-                cursor.close()
-                conn.close()
-                return False, "Order not found"
-
-            order_date, current_status = result
-
-            # Validate ship_date if provided
-            if ship_date:
-                is_valid, message = self.validator.validate_ship_date(order_date, ship_date)
-                if not is_valid:
-                    cursor.close()
-                    conn.close()
-                    return False, message
-
-                # Update both status and ship_date
-                query = """
-                    UPDATE orders
-                    SET order_status = %s, ship_date = %s
-                    WHERE order_id = %s
-                """
-                cursor.execute(query, (new_status, ship_date, order_id))
-            else:
-                # Update only status
-                query = """
-                    UPDATE orders
-                    SET order_status = %s
-                    WHERE order_id = %s
-                """
-                cursor.execute(query, (new_status, order_id))
-
-            conn.commit()
-            cursor.close()
-            conn.close()
-            return True, f"Order #{order_id} updated to '{new_status}'"
+            with borrow_conn() as conn, conn.cursor() as cursor:
+                if ship_date:
+                    # Update both status and ship_date (only if ship_date >= order_date)
+                    execute_prepared(cursor, 'update_order_status_ship_date',
+                                     (new_status, ship_date, order_id, ship_date))
+                else:
+                    # Update only status
+                    execute_prepared(cursor, 'update_order_status', (new_status, order_id))
+
+                if cursor.fetchone() is None:
+                    if not ship_date:
+                        return False, "Order not found"
+
+                    # Nothing matched: look the order up only to explain why
+                    execute_prepared(cursor, 'order_date_status', (order_id,))
+                    result = cursor.fetchone()
+                    if not result:
+                        return False, "Order not found"
+                    is_valid, message = self.validator.validate_ship_date(result['order_date'], ship_date)
+                    return False, message if not is_valid else "Order not updated"
+
+                conn.commit()
         except Exception as e:
-            conn.rollback()
-            conn.close()
             return False, f"Error updating order: {str(e)}"
 
+        _clear_order_caches()
+        return True, f"Order #{order_id} updated to '{new_status}'"
+
     def get_order_details(self, order_id):
         """Retrieve order details with items (updated to include ship_date)"""
-        conn = get_db_connection()
-        if not conn:
-            return None
-
         try:
-            cursor = conn.cursor()
-
-            # Get order info - UPDATED to include ship_date
-            order_query = """
-                SELECT o.order_id, o.order_date, o.total_amount, o.order_status,
-                       c.first_name, c.last_name, c.email,
-                       pm.method_name, ch.channel_name, o.ship_date
-                FROM orders o
-                JOIN customers c ON o.customer_id = c.customer_id
-                JOIN payment_methods pm ON o.payment_method_id = pm.payment_method_id
-                JOIN channels ch ON o.channel_id = ch.channel_id
-                WHERE o.order_id = %s
-            """
-            cursor.execute(order_query, (order_id,))
-            order = cursor.fetchone()
-
-            # Get order items
-            items_query = """
-                SELECT product_name, quantity, unit_price, subtotal
-                FROM order_items
-                WHERE order_id = %s
-            """
-            cursor.execute(items_query, (order_id,))
-            items = cursor.fetchall()
-
-            cursor.close()
-            conn.close()
-
+            with borrow_conn() as conn, conn.cursor() as cursor:
+                # Get order info (including ship_date) with its items
+                execute_prepared(cursor, 'order_details', (order_id,))
+                order = cursor.fetchone()
+
+            if order is None:
+                return {'order': None, 'items': []}
+            # psycopg2 decodes the json column into a list of dicts
+            items = order.pop('items')
             return {'order': order, 'items': items}
         except Exception as e:
             st.error(f"Error fetching order details: {e}")
             return None
 
-    def get_all_orders(self):
-        """Retrieve all orders with summary information"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-
+    def get_all_orders(self, limit=None, offset=0):
+        """Retrieve orders with summary information (one page when limit is set)"""
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT o.order_id, o.order_date, o.ship_date, o.order_status,
-                       o.total_amount, c.first_name, c.last_name,
-                       pm.method_name, ch.channel_name
-                FROM orders o
-                JOIN customers c ON o.customer_id = c.customer_id
-                JOIN payment_methods pm ON o.payment_method_id = pm.payment_method_id
-                JOIN channels ch ON o.channel_id = ch.channel_id
-                ORDER BY o.order_date DESC
-            """)
-            orders = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return orders
+            return _fetch_all_orders(limit, offset)
         except Exception as e:
             st.error(f"Error fetching orders: {e}")
             return []
 
-
-    # Add to ECommerceDB class in db.py
-
-    def get_revenue_by_day(self, limit=200):
-        """Get daily revenue from latest orders"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-        
+    def get_order_count(self):
+        """Count all orders"""
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    DATE(order_date) as date,
-                    SUM(total_amount) as revenue
-                FROM orders
-                GROUP BY order_date
-                ORDER BY order_date DESC
-                LIMIT %s
-            """, (limit,))
-            
-            # Group by date and sum
-            cursor.execute("""
-                SELECT 
-                    DATE(order_date) as date,
-                    SUM(total_amount) as revenue
-                FROM (
-                    SELECT order_date, total_amount
-                    FROM orders
-                    ORDER BY order_date DESC
-                    LIMIT %s
-                ) as latest_orders
-                GROUP BY DATE(order_date)
-                ORDER BY date
-            """, (limit,))
-            
-            data = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return data
+            return _fetch_order_count()
         except Exception as e:
-            st.error(f"Error fetching revenue data: {e}")
-            return []
+            st.error(f"Error counting orders: {e}")
+            return 0
 
-    def get_orders_by_day(self, limit=200):
-        """Get order count by day from latest orders"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-        
+    def get_daily_metrics(self, days=30):
+        """Get daily revenue and order count for the last `days` days"""
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    DATE(order_date) as date,
-                    COUNT(*) as order_count
-                FROM (
-                    SELECT order_date
-                    FROM orders
-                    ORDER BY order_date DESC
-                    LIMIT %s
-                ) as latest_orders
-                GROUP BY DATE(order_date)
-                ORDER BY date
-            """, (limit,))
-            
-            data = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return data
+            return _fetch_daily_metrics(days)
         except Exception as e:
-            st.error(f"Error fetching order count data: {e}")
+            st.error(f"Error fetching daily metrics: {e}")
             return []
 
-    def get_latest_orders_table(self, limit=200):
-        """Get latest orders for table display"""
-        conn = get_db_connection()
-        if not conn:
-            return []
-        
+    def get_revenue_by_day(self, days=30):
+        """Get daily revenue for the last `days` days (from the cached daily metrics)"""
+        return [{'date': row['date'], 'revenue': row['revenue']}
+                for row in self.get_daily_metrics(days)]
+
+    def get_orders_by_day(self, days=30):
+        """Get order count by day for the last `days` days (from the cached daily metrics)"""
+        return [{'date': row['date'], 'order_count': row['order_count']}
+                for row in self.get_daily_metrics(days)]
+
+    def get_latest_orders_frame(self, limit=200):
+        """Get latest orders as a typed DataFrame (None on error)"""
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    o.order_id,
-                    c.customer_id,
-                    o.order_date,
-                    o.ship_date,
-                    o.order_status as status,
-                    pc.category_name as category,
-                    ch.channel_name as channel,
-                    o.total_amount,
-                    COALESCE(o.discount, 0) as discount,
-                    pm.method_name as payment
-                FROM orders o
-                JOIN customers c ON o.customer_id = c.customer_id
-                JOIN channels ch ON o.channel_id = ch.channel_id
-                JOIN payment_methods pm ON o.payment_method_id = pm.payment_method_id
-                LEFT JOIN order_items oi ON o.order_id = oi.order_id
-                LEFT JOIN products p ON oi.product_name = p.product_name
-                LEFT JOIN product_categories pc ON p.category_id = pc.category_id
-                ORDER BY o.order_date DESC
-                LIMIT %s
-            """, (limit,))
-            
-            orders = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return orders
+            return _fetch_latest_orders(limit)[0]
         except Exception as e:
             st.error(f"Error fetching latest orders: {e}")
-            return []
-
+            return None
 
+    def export_latest_orders_csv(self, limit=200):
+        """Export the latest orders table as CSV bytes (the rows the table shows)"""
+        try:
+            return _fetch_latest_orders(limit)[1]
+        except Exception as e:
+            st.error(f"Error exporting latest orders: {e}")
+            return None
 
     def get_dashboard_stats(self):
         """Get summary statistics for dashboard"""
-        conn = get_db_connection()
-        if not conn:
-            return None
-        
         try:
-            cursor = conn.cursor()
-            
-            # Total revenue
-            cursor.execute("SELECT COALESCE(SUM(total_amount), 0) FROM orders")
-            total_revenue = cursor.fetchone()[0]
-            
-            # Total orders
-            cursor.execute("SELECT COUNT(*) FROM orders")
-            total_orders = cursor.fetchone()[0]
-            
-            # Total customers
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            total_customers = cursor.fetchone()[0]
-            
-            # Average order value
-            cursor.execute("SELECT COALESCE(AVG(total_amount), 0) FROM orders")
-            avg_order_value = cursor.fetchone()[0]
-            
-            # Orders by status
-            cursor.execute("""
-                SELECT order_status, COUNT(*) 
-                FROM orders 
-                GROUP BY order_status
-            """)
-            orders_by_status = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return {
-                'total_revenue': float(total_revenue),
-                'total_orders': total_orders,
-                'total_customers': total_customers,
-                'avg_order_value': float(avg_order_value),
-                'orders_by_status': orders_by_status
-            }
+            return _fetch_dashboard_stats()
         except Exception as e:
             st.error(f"Error fetching dashboard stats: {e}")
             return None
+
@@ -0,0 +1,7 @@
+-- Index for per-order lookups on order_items.
+-- Run once in the Neon SQL editor, outside a transaction block.
+
+-- The latest-orders table resolves each order's category with a subquery
+-- on order_items.order_id, and order details fetch items by order_id.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_order_items_order_id
+    ON order_items (order_id);
@@ -0,0 +1,13 @@
+-- Let Postgres compute order_items.subtotal instead of the application.
+-- Run once in the Neon SQL editor BEFORE deploying the matching db.py:
+-- afterwards create_order no longer sends subtotal, and inserting into a
+-- generated column is an error.
+-- Existing rows are recomputed from quantity * unit_price.
+
+BEGIN;
+
+ALTER TABLE order_items DROP COLUMN subtotal;
+ALTER TABLE order_items
+    ADD COLUMN subtotal NUMERIC(10, 2) GENERATED ALWAYS AS (quantity * unit_price) STORED;
+
+COMMIT;
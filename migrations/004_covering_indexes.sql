@@ -0,0 +1,24 @@
+-- Covering indexes for the dashboard and latest-orders reads.
+-- Run once in the Neon SQL editor. CREATE/DROP INDEX CONCURRENTLY cannot
+-- run inside a transaction block, so execute the statements one at a time.
+
+-- Latest-orders, Manage Orders and the daily charts all read
+-- ORDER BY order_date DESC, order_id DESC LIMIT N. Carrying the selected
+-- columns in the index lets Postgres answer with an index-only scan.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_order_date_covering
+    ON orders (order_date DESC, order_id DESC)
+    INCLUDE (total_amount, order_status, customer_id, payment_method_id,
+             channel_id, ship_date, discount);
+
+-- Superseded by the covering index above (migration 001)
+DROP INDEX CONCURRENTLY IF EXISTS idx_orders_order_date;
+
+-- Category lookup in the latest-orders subquery joins order_items to
+-- products by name. order_items(order_id) is indexed by migration 002 and
+-- customers.email already has the unique constraint's index.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_products_name_category
+    ON products (product_name, category_id);
+
+ANALYZE orders;
+ANALYZE order_items;
+ANALYZE products;
@@ -0,0 +1,22 @@
+-- Link order_items to products by id instead of by product name.
+-- Run once in the Neon SQL editor BEFORE deploying the matching db.py.
+
+BEGIN;
+
+ALTER TABLE order_items
+    ADD COLUMN IF NOT EXISTS product_id INTEGER REFERENCES products (product_id);
+
+-- Backfill existing lines from their product name
+UPDATE order_items oi
+SET product_id = p.product_id
+FROM products p
+WHERE oi.product_id IS NULL
+  AND oi.product_name = p.product_name;
+
+COMMIT;
+
+-- idx_products_name_category from migration 004 stays: the backfill above,
+-- create_order and bulk_create_order_items resolve items sent without an
+-- id by product_name.
+
+ANALYZE order_items;